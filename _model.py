@@ -0,0 +1,68 @@
+# _model.py
+# Lazily loaded, process-wide WhisperX models shared by the scripts.
+
+import os
+from functools import lru_cache
+
+from config_transcribe import device, model_size, compute_type, beam_size, threads
+
+def resolve_compute_type():
+    """
+    compute_type from the config, or the quantised default for the device.
+    """
+    if compute_type:
+        return compute_type
+    return "float16" if device.startswith("cuda") else "int8"
+
+@lru_cache(maxsize=1)
+def get_model():
+    """
+    Load the WhisperX ASR model once per process and reuse it afterwards.
+    """
+    import whisperx
+
+    ct = resolve_compute_type()
+    print(f"[INFO] Loading model '{model_size}' on {device} with {ct} precision...")
+    return whisperx.load_model(model_size, device=device, compute_type=ct,
+                               asr_options={"beam_size": beam_size},
+                               threads=threads or os.cpu_count())
+
+@lru_cache(maxsize=2)
+def get_align_model(language_code, model_name=None):
+    """
+    Load the alignment model (and its metadata) for a language once per process.
+    """
+    import whisperx
+
+    print("[INFO] Loading alignment model...")
+    align_model, metadata = whisperx.load_align_model(
+        language_code=language_code,
+        device=device,
+        model_name=model_name
+    )
+    return _compile(align_model), metadata
+
+def _compile(model):
+    """
+    Wrap the wav2vec model in torch.compile on CUDA (torch >= 2.1); falls back
+    to the eager model if it can't be compiled.
+    """
+    import torch
+    from whisperx.audio import SAMPLE_RATE
+
+    major, minor = (int(v) for v in torch.__version__.split(".")[:2])
+    if not device.startswith("cuda") or (major, minor) < (2, 1):
+        return model
+    # default mode + dynamic shapes: segment lengths differ on every call, and
+    # CUDA graphs ("reduce-overhead") would re-record per length and are not
+    # safe to replay from align_words' worker threads
+    compiled = torch.compile(model, dynamic=True, fullgraph=False)
+    try:
+        # compilation is lazy: trace once here so a failure falls back to eager
+        # instead of surfacing inside whisperx.align
+        with torch.inference_mode():
+            compiled(torch.zeros(1, SAMPLE_RATE, device=device))
+        return compiled
+    except Exception as e:
+        print(f"⚠ torch.compile failed for the alignment model, running eager: {e}")
+        return model
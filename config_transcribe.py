@@ -6,8 +6,23 @@ device = "cpu"
 # Model size: tiny, base, small, medium, large-v2, large-v3
 model_size = "large-v3"
 
-# Precision: "float32", "float16", or "int8"
-compute_type = "float32"
+# Precision: "float32", "float16", "int8" or "int8_float16".
+# None picks the fast choice for the device: "int8" on CPU, "float16" on CUDA
+# ("int8_float16" saves more VRAM on CUDA).
+compute_type = None
+
+# Batch size for WhisperX's batched (VAD-chunked) transcription. Lower it if you run out of GPU memory.
+batch_size = 16
+
+# Beam size for decoding. 1 (greedy) is fastest; WhisperX's default is 5.
+beam_size = 1
+
+# CPU threads for the CTranslate2 backend. None uses all cores.
+threads = None
+
+# DataLoader workers for WhisperX's batched transcription. Keep 0 (WhisperX's default):
+# its dataset is an unsharded generator, so extra workers decode every chunk twice.
+num_workers = 0
 
 # Language code for transcription: "en", "es", "it". Set to None to auto-detect
 language = "en"
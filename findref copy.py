@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 import argparse
 import glob
-import json
 import os
 import re
 
 from config_findref import ROUNDNESS_MS
+import jsonio
+
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+_WS_RE = re.compile(r'\s+')
+# whitespace norm() would change: runs of it, or anything but a plain space
+_IRREGULAR_WS_RE = re.compile(r'\s\s|[^\S ]')
 
 def split_into_sentences(text):
     """
@@ -13,10 +18,16 @@ def split_into_sentences(text):
     """
     return [
         s.strip() 
-        for s in re.split(r'(?<=[.!?])\s+', text.strip())
+        for s in _SENT_RE.split(text.strip())
         if s
     ]
 
+def norm(s):
+    """
+    Canonical form used for matching: trimmed, internal whitespace collapsed.
+    """
+    return _WS_RE.sub(' ', s).strip()
+
 def main():
     parser = argparse.ArgumentParser(
         description="Find and group sentences in JSON files based on proximity."
@@ -55,16 +66,16 @@ def main():
     if not sentences:
         print("No sentences provided. Use -t to specify sentences.")
         return
-    sentences_set = set(sentences)
+    sentences_set = frozenset(norm(s) for s in sentences)
 
     results = []
+    contains = sentences_set.__contains__
 
     # 3) Process each file
     for json_file in json_files:
         try:
-            with open(json_file, "r") as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            data = jsonio.load(json_file)
+        except (FileNotFoundError, jsonio.JSONDecodeError) as e:
             print(f"Warning: Cannot read {json_file}: {e}")
             continue
 
@@ -73,31 +84,35 @@ def main():
         fname = os.path.basename(json_file)
 
         for entry in data:
-            text = entry.get("text", "")
-            entry_start = entry.get("start")
+            get = entry.get
+            text = get("text", "")
+            entry_start = get("start")
             if entry_start is None:
                 print(f"Warning: Entry missing 'start' in {json_file}")
                 continue
 
-            spans = entry.get("sentence_spans", [])
-            # Gather all matching sentences with absolute timestamps
+            spans = get("sentence_spans", [])
+            # Gather all matching sentences as (sentence, abs_start, abs_end)
             matches = []
+            add = matches.append
             for start_off, end_off in spans:
                 s = text[start_off:end_off].strip()
-                if s in sentences_set:
-                    matches.append({
-                        "sentence": s,
-                        "start": entry_start + start_off,
-                        "end":   entry_start + end_off
-                    })
+                if not contains(s):
+                    # most spans miss; only normalise when it could change s
+                    if not _IRREGULAR_WS_RE.search(s):
+                        continue
+                    s = norm(s)
+                    if not contains(s):
+                        continue
+                add((s, entry_start + start_off, entry_start + end_off))
 
             # If we found matches, group them by proximity
             if matches:
-                matches.sort(key=lambda x: x["start"])
+                matches.sort(key=lambda m: m[1])
                 grouped = []
                 current = [matches[0]]
                 for m in matches[1:]:
-                    if m["start"] - current[-1]["end"] <= ROUNDNESS_MS:
+                    if m[1] - current[-1][2] <= ROUNDNESS_MS:
                         current.append(m)
                     else:
                         grouped.append(current)
@@ -109,9 +124,9 @@ def main():
                     results.append({
                         "folder":    grandparent,
                         "file":      fname,
-                        "start":     grp[0]["start"],
-                        "end":       grp[-1]["end"],
-                        "sentences": [m["sentence"] for m in grp]
+                        "start":     grp[0][1],
+                        "end":       grp[-1][2],
+                        "sentences": [m[0] for m in grp]
                     })
 
     # 4) Write output
@@ -120,8 +135,7 @@ def main():
         out_dir = os.path.join("processing", base)
         os.makedirs(out_dir, exist_ok=True)
         out_path = os.path.join(out_dir, args.output)
-        with open(out_path, "w") as f:
-            json.dump(results, f, indent=4)
+        jsonio.dump(results, out_path)
         print(f"Output saved to {out_path}")
     else:
         print("No matches found.")
@@ -1,8 +1,9 @@
 import argparse
-import json
 import os
 import glob
 
+import jsonio
+
 def main():
     parser = argparse.ArgumentParser(description="Find sentences in JSON files and output timestamps.")
     parser.add_argument("-j", "--json-files", nargs="*", default=[], help="Specific JSON files to process")
@@ -33,31 +34,30 @@ def main():
     # Process each JSON file
     for json_file in json_files:
         try:
-            with open(json_file, "r") as f:
-                data = json.load(f)
-                grandparent_folder = os.path.basename(os.path.dirname(os.path.dirname(json_file)))
-                file_name = os.path.basename(json_file)
-                for entry in data:
-                    text = entry["text"]
-                    start = entry["start"]
-                    end = entry["end"]
-                    sentence_spans = entry.get("sentence_spans", [])
-                    matching_sentences = []
-                    for span in sentence_spans:
-                        sentence = text[span[0]:span[1]].strip()
-                        if sentence in sentences:
-                            matching_sentences.append(sentence)
-                    if matching_sentences:
-                        results.append({
-                            "folder": grandparent_folder,
-                            "file": file_name,
-                            "start": start,
-                            "end": end,
-                            "sentences": matching_sentences
-                        })
+            data = jsonio.load(json_file)
+            grandparent_folder = os.path.basename(os.path.dirname(os.path.dirname(json_file)))
+            file_name = os.path.basename(json_file)
+            for entry in data:
+                text = entry["text"]
+                start = entry["start"]
+                end = entry["end"]
+                sentence_spans = entry.get("sentence_spans", [])
+                matching_sentences = []
+                for span in sentence_spans:
+                    sentence = text[span[0]:span[1]].strip()
+                    if sentence in sentences:
+                        matching_sentences.append(sentence)
+                if matching_sentences:
+                    results.append({
+                        "folder": grandparent_folder,
+                        "file": file_name,
+                        "start": start,
+                        "end": end,
+                        "sentences": matching_sentences
+                    })
         except FileNotFoundError:
             print(f"Warning: File {json_file} not found.")
-        except json.JSONDecodeError:
+        except jsonio.JSONDecodeError:
             print(f"Warning: File {json_file} is not a valid JSON.")
         except KeyError as e:
             print(f"Warning: File {json_file} missing required field {e}.")
@@ -68,8 +68,7 @@ def main():
         output_dir = os.path.join("processing", output_base_name)
         output_path = os.path.join(output_dir, args.output)
         os.makedirs(output_dir, exist_ok=True)
-        with open(output_path, "w") as f:
-            json.dump(results, f, indent=4)
+        jsonio.dump(results, output_path)
         print(f"Output saved to {output_path}")
     else:
         print("No matches found.")
@@ -1,18 +1,75 @@
 #!/usr/bin/env python3
 import argparse
 import glob
-import json
+import heapq
 import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from config_findref import GROUP_GAP_S
+import jsonio
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
 
 def split_into_sentences(text):
     return [
         s.strip()
-        for s in re.split(r'(?<=[.!?])\s+', text.strip())
+        for s in _SENT_RE.split(text.strip())
         if s
     ]
 
+def build_matcher(sentences):
+    """
+    Return a function txt -> list of the sentences contained in txt, in the
+    order of `sentences`. With pyahocorasick each text is scanned once
+    instead of once per sentence.
+    """
+    if ahocorasick is not None:
+        A = ahocorasick.Automaton()
+        for i, s in enumerate(sentences):
+            A.add_word(s, (i, s))
+        A.make_automaton()
+        # iter() reports every occurrence, nested and overlapping ones included
+        return lambda txt: [s for _, s in sorted(set(v for _, v in A.iter(txt)))]
+
+    # fallback: a substring test per sentence (a single regex would drop
+    # nested/overlapping sentences, as findall never overlaps matches)
+    return lambda txt: [s for s in sentences if s in txt]
+
+@lru_cache(maxsize=1)
+def _matcher_for(sentences_tuple):
+    # built once per worker process, reused for every file it scans
+    return build_matcher(sentences_tuple)
+
+def scan_file(path, sentences_tuple):
+    """
+    Scan one *_sentence.json and return its hits (segments containing
+    any of the sentences), sorted by start. Runs in a worker process.
+    """
+    match = _matcher_for(sentences_tuple)
+    data = jsonio.load(path)
+    grand = os.path.basename(os.path.dirname(os.path.dirname(path)))
+    fname = os.path.basename(path)
+    hits = []
+    for seg in data:
+        found = match(seg["text"])
+        if not found: continue
+        hits.append({
+            "folder":   grand,
+            "file":     fname,
+            "start":    seg["start"],
+            "end":      seg["end"],
+            "sentences": found
+        })
+    hits.sort(key=lambda x: x["start"])
+    return hits
+
 def main():
     p = argparse.ArgumentParser(
         description="Locate WhisperX segments that contain your sentences."
@@ -29,7 +86,10 @@ def main():
     sentences = []
     for block in args.text:
         sentences.extend(split_into_sentences(block))
-    S = set(sentences)
+    S = tuple(sorted(set(sentences)))
+    if not S:
+        print("❌ No sentences to search for.", file=sys.stderr)
+        return
 
     # gather all sentence-level JSONs
     files = []
@@ -39,43 +99,40 @@ def main():
         print("❌ No *_sentence.json files found.", file=sys.stderr)
         return
 
-    hits = []
-    for path in files:
-        data = json.load(open(path, encoding="utf-8"))
-        grand = os.path.basename(os.path.dirname(os.path.dirname(path)))
-        fname = os.path.basename(path)
-        for seg in data:
-            txt = seg["text"]
-            found = [s for s in S if s in txt]
-            if not found: continue
-            hits.append({
-                "folder":   grand,
-                "file":     fname,
-                "start":    seg["start"],
-                "end":      seg["end"],
-                "sentences": found
-            })
+    # files are independent → scan them in parallel
+    scan = partial(scan_file, sentences_tuple=S)
+    if len(files) == 1:
+        per_file_hits = [scan(files[0])]
+    else:
+        with ProcessPoolExecutor() as ex:
+            per_file_hits = list(ex.map(scan, files))
 
-    # optionally merge if segments are very close
-    hits.sort(key=lambda x: x["start"])
+    # each file's hits are already in order → k-way merge instead of a global sort
+    hits = heapq.merge(*per_file_hits, key=lambda x: x["start"])
+
+    # optionally merge if segments are very close; sentences are kept as an
+    # insertion-ordered dict so repeats across merged segments dedupe in O(1)
     out = []
-    if hits:
-        cur = hits[0].copy()
-        for nxt in hits[1:]:
+    cur = next(hits, None)
+    if cur is not None:
+        cur = {**cur, "sentences": dict.fromkeys(cur["sentences"])}
+        for nxt in hits:
             if nxt["start"] - cur["end"] <= GROUP_GAP_S:
                 cur["end"] = max(cur["end"], nxt["end"])
-                cur["sentences"].extend(nxt["sentences"])
+                cur["sentences"].update(dict.fromkeys(nxt["sentences"]))
             else:
                 out.append(cur)
-                cur = nxt.copy()
+                cur = {**nxt, "sentences": dict.fromkeys(nxt["sentences"])}
         out.append(cur)
+    for o in out:
+        o["sentences"] = list(o["sentences"])
 
     # write
     base = os.path.splitext(args.output)[0]
     odir = os.path.join("processing", base)
     os.makedirs(odir, exist_ok=True)
     out_path = os.path.join(odir, f"{base}.json")
-    json.dump(out, open(out_path, "w", encoding="utf-8"), indent=2)
+    jsonio.dump(out, out_path)
     print(f"✅ Found {len(out)} segment(s) → {out_path}")
 
 if __name__ == "__main__":
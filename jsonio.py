@@ -0,0 +1,53 @@
+# jsonio.py
+# JSON read/write helpers: orjson when installed, stdlib json otherwise.
+
+import json
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses this, so one except clause covers both
+JSONDecodeError = json.JSONDecodeError
+
+def _dumps(obj, pretty):
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if pretty else None, ensure_ascii=False).encode("utf-8")
+
+def load(path):
+    """
+    Parse the JSON file at path.
+    """
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def dump(obj, path, pretty=True):
+    """
+    Write obj to path as UTF-8 JSON, 2-space indented when pretty.
+    """
+    Path(path).write_bytes(_dumps(obj, pretty))
+
+def dump_iter(items, path, pretty=True):
+    """
+    Write an iterable to path as a JSON array one element at a time, so the
+    whole list never has to be held in memory.
+    """
+    with open(path, "wb") as f:
+        f.write(b"[")
+        empty = True
+        for item in items:
+            data = _dumps(item, pretty)
+            if pretty:
+                # nest the element one level inside the array
+                data = b"\n  " + data.replace(b"\n", b"\n  ")
+            f.write(data if empty else b"," + data)
+            empty = False
+        f.write(b"\n]" if pretty and not empty else b"]")
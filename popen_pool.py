@@ -0,0 +1,40 @@
+# popen_pool.py
+# Run ffmpeg (or any) commands as background processes, a bounded number at a time.
+
+import subprocess
+
+class BoundedPopen:
+    """
+    Launch commands with subprocess.Popen, keeping at most `limit` running.
+    Use as a context manager: leaving the block waits for every process and
+    raises CalledProcessError if any of them failed.
+    """
+    def __init__(self, limit=4):
+        self.limit = limit
+        self.running = []
+
+    def submit(self, cmd):
+        while len(self.running) >= self.limit:
+            self._reap(self.running.pop(0))
+        self.running.append(subprocess.Popen(cmd))
+
+    def wait(self):
+        while self.running:
+            self._reap(self.running.pop(0))
+
+    @staticmethod
+    def _reap(proc):
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.wait()
+        else:
+            # don't leave orphaned ffmpeg processes behind on error
+            for proc in self.running:
+                proc.wait()
+        return False
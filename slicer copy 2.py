@@ -2,7 +2,6 @@
 # slicer.py
 
 import argparse
-import json
 import os
 import subprocess
 import sys
@@ -10,30 +9,43 @@ import tempfile
 import shutil
 
 import whisperx
-from config_transcribe import device, model_size, compute_type, language
-
-def transcribe_sentences(clip_path, model):
+from whisperx.audio import SAMPLE_RATE
+from config_transcribe import language, batch_size
+from _model import get_model
+import jsonio
+from sources import resolve_videos
+from popen_pool import BoundedPopen
+
+def transcribe_sentences(clips, model):
     """
-    Perform sentence‐level transcription on clip_path.
-    Returns list of segments with 'start'/'end' times relative to clip.
+    Perform sentence‐level transcription on several in-memory audio clips
+    (float32 mono @ SAMPLE_RATE), one transcribe call per clip.
+    Returns one list of segments per clip, 'start'/'end' relative to that clip.
     """
-    audio = whisperx.load_audio(clip_path)
-    result = model.transcribe(audio, language=language)
-    return result["segments"]
+    # clips are not joined into one stream: WhisperX merges VAD regions into
+    # 30 s chunks regardless of silence, which would fuse short clips together
+    return [
+        model.transcribe(clip, batch_size=batch_size, language=language)["segments"]
+        for clip in clips
+    ]
 
-def cut_video(src, start, end, dst):
+def cut_video(src, start, end, dst, runner=None):
     """
     Cut [start,end] seconds from src → dst (frame‐accurate).
+    With a BoundedPopen runner the cut is started in the background.
     """
     cmd = [
         "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start:.3f}",  # input-side seek (fast)
         "-i", src,
-        "-ss", f"{start:.3f}",
-        "-to", f"{end:.3f}",
+        "-t", f"{end - start:.3f}",
         "-c", "copy",
         dst
     ]
-    subprocess.run(cmd, check=True)
+    if runner is not None:
+        runner.submit(cmd)
+    else:
+        subprocess.run(cmd, check=True)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -52,7 +64,7 @@ def main():
     json_path = os.path.join("processing", in_base, f"{in_base}.json")
     if not os.path.isfile(json_path):
         sys.exit(f"Error: JSON not found: {json_path}")
-    entries = json.load(open(json_path, encoding="utf-8"))
+    entries = jsonio.load(json_path)
     if not entries:
         sys.exit("ℹ No segments to cut; exiting.")
 
@@ -60,8 +72,7 @@ def main():
     entries.sort(key=lambda e: e["start"])
 
     # 2) Prepare WhisperX model for sentence re‐transcription
-    print(f"[INFO] Loading WhisperX model '{model_size}' on {device} ({compute_type})...")
-    model = whisperx.load_model(model_size, device=device, compute_type=compute_type)
+    model = get_model()
 
     # 3) Prepare output dirs
     processed_dir = os.path.join("processed", out_base)
@@ -69,48 +80,63 @@ def main():
     final_vid = os.path.join(processed_dir, f"{in_base}.mp4")
 
     tmp_dir = tempfile.mkdtemp(prefix="slicer_")
-    cut_clips = []
-
-    # tolerance to detect partial sentences
-    eps = 0.05
 
+    # group entries per source so each video's audio is decoded only once
+    videos = resolve_videos(entries)
+    by_src = {}
     for idx, ent in enumerate(entries):
-        folder = ent["folder"]
-        base = folder[:-6] if folder.endswith("_files") else folder
-        video_file = os.path.join(folder, f"{base}.mp4")
-        if not os.path.isfile(video_file):
-            print(f"⚠ Missing video: {video_file}, skipping", file=sys.stderr)
+        video_file = videos[ent["folder"]]
+        if video_file is None:
             continue
+        by_src.setdefault(video_file, []).append((idx, ent))
 
-        # initial cut on findref times
-        init_clip = os.path.join(tmp_dir, f"{idx:03d}_init.mp4")
-        cut_video(video_file, ent["start"], ent["end"], init_clip)
-        clip_duration = ent["end"] - ent["start"]
-
-        # re‐transcribe the clip to get exact sentence boundaries
-        segs = transcribe_sentences(init_clip, model)
-        if not segs:
-            print(f"⚠ No sentence segments in clip {idx}, removing", file=sys.stderr)
-            os.remove(init_clip)
-            continue
+    # tolerance to detect partial sentences
+    eps = 0.05
 
-        # drop first if partial at start, drop last if partial at end
-        first, last = segs[0], segs[-1]
-        new_start = first["start"] if first["start"] > eps else 0.0
-        new_end   = last["end"]   if last["end"]   < clip_duration - eps else clip_duration
-
-        # if trimming needed, produce a trimmed clip
-        if new_start > eps or new_end < clip_duration - eps:
-            trim_clip = os.path.join(tmp_dir, f"{idx:03d}_trim.mp4")
-            cut_video(init_clip, new_start, new_end, trim_clip)
-            os.remove(init_clip)
-            final_clip = trim_clip
-            print(f"[{idx}] Trimmed partial sentences → {new_start:.3f}-{new_end:.3f}s")
-        else:
-            final_clip = init_clip
-            print(f"[{idx}] Contains full sentences → keeping entire clip")
-
-        cut_clips.append(final_clip)
+    # cuts run in the background while the next source is transcribed
+    clip_for = {}
+    # leaving the block waits for every background cut; on an error the
+    # temp folder is removed as well
+    try:
+        with BoundedPopen() as runner:
+            for video_file, items in by_src.items():
+                full_audio = whisperx.load_audio(video_file)
+
+                # re‐transcribe each of this source's spans from memory to get exact
+                # sentence boundaries
+                clips = [
+                    full_audio[int(ent["start"] * SAMPLE_RATE):int(ent["end"] * SAMPLE_RATE)]
+                    for _, ent in items
+                ]
+                all_segs = transcribe_sentences(clips, model)
+
+                for (idx, ent), segs in zip(items, all_segs):
+                    clip_duration = ent["end"] - ent["start"]
+                    if not segs:
+                        print(f"⚠ No sentence segments in clip {idx}, removing", file=sys.stderr)
+                        continue
+
+                    # drop first if partial at start, drop last if partial at end
+                    first, last = segs[0], segs[-1]
+                    new_start = first["start"] if first["start"] > eps else 0.0
+                    new_end   = last["end"]   if last["end"]   < clip_duration - eps else clip_duration
+
+                    if new_start > eps or new_end < clip_duration - eps:
+                        print(f"[{idx}] Trimmed partial sentences → {new_start:.3f}-{new_end:.3f}s")
+                    else:
+                        print(f"[{idx}] Contains full sentences → keeping entire clip")
+
+                    # single cut straight from the source at the refined boundaries
+                    final_clip = os.path.join(tmp_dir, f"{idx:03d}.mp4")
+                    cut_video(video_file, ent["start"] + new_start, ent["start"] + new_end, final_clip, runner)
+                    clip_for[idx] = final_clip
+
+                del full_audio  # free before decoding the next source
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    cut_clips = [clip_for[idx] for idx in sorted(clip_for)]
 
     if not cut_clips:
         shutil.rmtree(tmp_dir)
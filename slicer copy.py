@@ -2,12 +2,29 @@
 # slicer.py
 
 import argparse
-import json
 import os
 import subprocess
 import sys
 import tempfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import jsonio
+from sources import resolve_videos
+
+def cut_clip(src, start, end, dst):
+    """
+    Cut [start,end] seconds from src → dst, copying codecs.
+    """
+    cmd = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start:.3f}",  # input-side seek (fast)
+        "-i", src,
+        "-t", f"{end - start:.3f}",
+        "-c", "copy",
+        dst
+    ]
+    subprocess.run(cmd, check=True)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -30,7 +47,7 @@ def main():
     if not os.path.isfile(json_path):
         sys.exit(f"Error: JSON not found: {json_path}")
 
-    segments = json.load(open(json_path, encoding="utf-8"))
+    segments = jsonio.load(json_path)
     if not segments:
         sys.exit("ℹ No segments to cut; exiting.")
 
@@ -39,28 +56,24 @@ def main():
     final_vid = os.path.join(out_dir, f"{in_base}.mp4")
 
     tmp = tempfile.mkdtemp(prefix="slicer_")
-    cuts = []
-
+    videos = resolve_videos(segments)
+    jobs = []
     for idx, seg in enumerate(segments):
-        fld = seg["folder"]
-        name = fld[:-6] if fld.endswith("_files") else fld
-        src  = os.path.join(fld, f"{name}.mp4")
-        if not os.path.isfile(src):
-            print(f"⚠ Skipping missing video: {src}", file=sys.stderr)
+        src = videos[seg["folder"]]
+        if src is None:
             continue
 
         cut_path = os.path.join(tmp, f"{idx:03d}.mp4")
-        cmd = [
-            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
-            "-i", src,
-            "-ss", f"{seg['start']:.3f}",
-            "-to", f"{seg['end']:.3f}",
-            "-c", "copy",
-            cut_path
-        ]
         print(f"[{idx}] Cutting {seg['start']:.3f}s–{seg['end']:.3f}s from {src}")
-        subprocess.run(cmd, check=True)
-        cuts.append(cut_path)
+        jobs.append((src, seg["start"], seg["end"], cut_path))
+
+    # run the ffmpeg cuts concurrently; outputs are named by index so the
+    # concat order stays deterministic
+    if jobs:
+        workers = min(len(jobs), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(lambda j: cut_clip(*j), jobs))
+    cuts = [j[3] for j in jobs]
 
     if not cuts:
         sys.exit("ℹ No cuts made; exiting.")
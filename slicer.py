@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 import argparse
-import json
+import hashlib
 import os
 import subprocess
 import sys
 import tempfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
 from config_transcribe import SILENCE_BETWEEN_CLIPS_S
+import jsonio
+from sources import resolve_videos
+from popen_pool import BoundedPopen
+
+# longest gap between keyframes in the keyed video (seconds)
+KEYINT_S = 2.0
 
 def force_keyframes(src, times, dst):
     """
@@ -16,29 +23,171 @@ def force_keyframes(src, times, dst):
     """
     # build comma-separated list of times like "12.345,67.890,…"
     times_str = ",".join(f"{t:.3f}" for t in sorted(set(times)))
+    _, fps = probe_video(src)
     cmd = [
         "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
         "-i", src,
         "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
         "-force_key_frames", times_str,
+        # no scenecut I-frames, but a periodic keyframe every KEYINT_S: a cut
+        # that misses its forced keyframe by a frame then snaps at most that
+        # far, not back to the previous cut point
+        "-x264-params", f"keyint={max(1, round(KEYINT_S * fps))}:min-keyint=1:scenecut=0",
         "-c:a", "copy",
         dst
     ]
     print(f"⟳ Forcing keyframes in {os.path.basename(src)} at {times_str}")
     subprocess.run(cmd, check=True)
 
-def cut_segment(src, start_s, end_s, dst):
+KEYED_CACHE_DIR = os.path.join("processing", "_keyed")
+
+def keyed_video(src, times):
+    """
+    Return a copy of `src` with keyframes forced at `times`, reusing the
+    cached one from an earlier run if the source and times are unchanged.
+    """
+    times_str = ",".join(f"{t:.3f}" for t in sorted(set(times)))
+    key = hashlib.sha1(
+        (src + str(os.path.getmtime(src)) + times_str + f"keyint={KEYINT_S}").encode()
+    ).hexdigest()
+    cache_path = os.path.join(KEYED_CACHE_DIR, f"{key}.mp4")
+    if os.path.isfile(cache_path):
+        print(f"⟳ Reusing keyed {os.path.basename(src)} from {cache_path}")
+        return cache_path
+
+    os.makedirs(KEYED_CACHE_DIR, exist_ok=True)
+    # encode next to the cache entry, then rename so an interrupted run
+    # never leaves a truncated file behind
+    part = os.path.join(KEYED_CACHE_DIR, f"{key}.part.mp4")
+    force_keyframes(src, times, part)
+    os.replace(part, cache_path)
+    return cache_path
+
+def cut_segment(src, start_s, end_s, dst, runner=None):
     """
     Frame-accurate cut [start_s,end_s] from `src` → `dst`, copying codecs.
+    With a BoundedPopen `runner` the cut is started in the background.
     """
     cmd = [
         "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start_s:.3f}",  # input-side seek (fast)
         "-i", src,
-        "-ss", f"{start_s:.3f}",
-        "-to", f"{end_s:.3f}",
+        "-t", f"{end_s - start_s:.3f}",
         "-c", "copy",
         dst
     ]
+    if runner is not None:
+        runner.submit(cmd)
+    else:
+        subprocess.run(cmd, check=True)
+
+def probe_video(src):
+    """
+    (container duration in seconds, video frame rate) of `src` (ffprobe).
+    """
+    out = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=r_frame_rate:format=duration",
+        "-of", "default=noprint_wrappers=1",
+        src
+    ], check=True, capture_output=True, text=True).stdout
+    info = dict(line.split("=", 1) for line in out.splitlines() if "=" in line)
+    num, _, den = info["r_frame_rate"].partition("/")
+    return float(info["duration"]), float(num) / float(den or 1)
+
+def split_segments(src, ranges, out_prefix):
+    """
+    Cut several non-overlapping [start_s,end_s] ranges from `src` in a single
+    ffmpeg pass using the segment muxer, copying codecs.
+    `src` should have keyframes at every range start/end (see force_keyframes),
+    since a stream-copy split can only land on a keyframe.
+    `ranges` must be sorted by start. Returns the kept piece paths in order,
+    or None when one segment pass can't produce them (overlapping/touching
+    ranges, nothing to split, or a split that missed its keyframe); the
+    caller should then cut them one by one.
+    """
+    bounds = []
+    for cs, ce in ranges:
+        if bounds and cs <= bounds[-1]:
+            return None
+        bounds += [cs, ce]
+
+    # pieces alternate gap/keep/gap/keep…; no leading gap when cutting from 0
+    # and no trailing gap when the last range runs to the end of the video
+    duration, fps = probe_video(src)
+    first_keep = 1
+    if bounds[0] <= 0.0:
+        bounds = bounds[1:]
+        first_keep = 0
+    if bounds and bounds[-1] >= duration:
+        bounds = bounds[:-1]
+    if not bounds:
+        return None
+    expected = len(bounds) + 1
+
+    pattern = f"{out_prefix}_%03d.mp4"
+    cmd = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-i", src,
+        "-c", "copy",
+        "-f", "segment",
+        "-segment_times", ",".join(f"{t:.3f}" for t in bounds),
+        # forced keyframes can land just before the requested time (rounding);
+        # half a frame of slack keeps the split on them (see ffmpeg's docs)
+        "-segment_time_delta", f"{0.5 / fps:.6f}",
+        "-reset_timestamps", "1",
+        pattern
+    ]
+    subprocess.run(cmd, check=True)
+
+    # a split that missed its keyframe shifts every later piece: don't hand
+    # back the wrong clips
+    produced = 0
+    while os.path.isfile(pattern % produced):
+        produced += 1
+    if produced != expected:
+        print(f"⚠ Segment split of {os.path.basename(src)} gave {produced} pieces, "
+              f"expected {expected}; cutting one by one", file=sys.stderr)
+        return None
+    return [pattern % (first_keep + 2 * i) for i in range(len(ranges))]
+
+def cut_source(src, jobs, tmp, n):
+    """
+    Cut every (idx, start_s, end_s) job taken from `src` into `tmp`.
+    Returns [(idx, clip_path), …].
+    """
+    jobs = sorted(jobs, key=lambda j: j[1])
+    print(f"[{n}] Cutting {len(jobs)} segment(s) from {os.path.basename(src)}")
+    pieces = split_segments(src, [(cs, ce) for _, cs, ce in jobs],
+                            os.path.join(tmp, f"src{n:03d}"))
+    if pieces is None:
+        # overlapping padded ranges (or a failed split) can't share one segment pass
+        pieces = []
+        with BoundedPopen() as runner:
+            for idx, cs, ce in jobs:
+                out_clip = os.path.join(tmp, f"{idx:03d}.mp4")
+                print(f"[{idx}] Cutting {cs:.3f}s → {ce:.3f}s from {os.path.basename(src)}")
+                cut_segment(src, cs, ce, out_clip, runner)
+                pieces.append(out_clip)
+    return [(idx, clip) for (idx, _, _), clip in zip(jobs, pieces)]
+
+def select_ranges(src, ranges, dst):
+    """
+    Keep only the [start_s,end_s] `ranges` of `src` and write them back to
+    back into `dst` in one ffmpeg pass (select/aselect filters, re-encoding),
+    so no intermediate clips or concat pass are needed.
+    """
+    sel = "+".join(f"between(t,{cs:.3f},{ce:.3f})" for cs, ce in ranges)
+    cmd = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-i", src,
+        "-vf", f"select='{sel}',setpts=N/FRAME_RATE/TB",
+        "-af", f"aselect='{sel}',asetpts=N/SR/TB",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+        "-c:a", "aac",
+        dst
+    ]
     subprocess.run(cmd, check=True)
 
 def main():
@@ -56,58 +205,78 @@ def main():
     proc_json = os.path.join("processing", in_base, f"{in_base}.json")
     if not os.path.isfile(proc_json):
         sys.exit(f"Error: JSON not found: {proc_json}")
-    entries = json.load(open(proc_json, encoding="utf-8"))
+    entries = jsonio.load(proc_json)
     if not entries:
         sys.exit("ℹ No segments found → nothing to cut.")
 
-    # 2) collect each unique video and its sentence-start times
+    # 2) prepare output
+    out_dir = os.path.join("processed", args.output)
+    os.makedirs(out_dir, exist_ok=True)
+    final_out = os.path.join(out_dir, f"{in_base}.mp4")
+    half_sil = SILENCE_BETWEEN_CLIPS_S / 2.0
+
+    # 3) collect each unique video and its padded cut points
+    videos = resolve_videos(entries)
     video_times = {}
+    video_ranges = {}
     for e in entries:
-        fld = e["folder"]
-        # derive base video name
-        base = fld[:-6] if fld.endswith("_files") else fld
-        video_path = os.path.join(fld, f"{base}.mp4")
-        if not os.path.isfile(video_path):
-            print(f"⚠ Video missing: {video_path}", file=sys.stderr)
+        video_path = videos[e["folder"]]
+        if video_path is None:
             continue
-        video_times.setdefault(video_path, []).append(e["start"])
+        cs, ce = max(0.0, e["start"] - half_sil), e["end"] + half_sil
+        # keyframes go exactly where the stream-copy cuts/splits happen
+        video_times.setdefault(video_path, []).extend((cs, ce))
+        video_ranges.setdefault(video_path, []).append((cs, ce))
 
-    # 3) set up temp workspace
+    # single source (the common case): one select pass straight to the final
+    # video — no keyframe forcing, intermediate clips or concat needed.
+    # select can only keep frames in time order, once each, so entries that
+    # go back in time or overlap take the cut + concat path instead
+    ranges = next(iter(video_ranges.values()), [])
+    in_order = all(a[1] < b[0] for a, b in zip(ranges, ranges[1:]))
+    if len(video_ranges) == 1 and in_order:
+        src = next(iter(video_ranges))
+        print(f"✂ Selecting {len(ranges)} segment(s) from {os.path.basename(src)}")
+        select_ranges(src, ranges, final_out)
+        print(f"✅ Finished: {final_out}")
+        return
+
+    # 4) set up temp workspace
     tmp = tempfile.mkdtemp(prefix="slicer_")
-    keyed_dir = os.path.join(tmp, "keyed")
-    os.makedirs(keyed_dir, exist_ok=True)
 
-    # 4) force keyframes in each source video
+    # 5) force keyframes in each source video (cached across runs)
     keyed_map = {}
     for src, times in video_times.items():
-        base = os.path.splitext(os.path.basename(src))[0]
-        dst = os.path.join(keyed_dir, f"{base}.mp4")
-        force_keyframes(src, times, dst)
-        keyed_map[src] = dst
+        keyed_map[src] = keyed_video(src, times)
 
-    # 5) prepare output
-    out_dir = os.path.join("processed", args.output)
-    os.makedirs(out_dir, exist_ok=True)
-    final_out = os.path.join(out_dir, f"{in_base}.mp4")
-
-    # 6) cut each segment (with optional silence padding)
-    half_sil = SILENCE_BETWEEN_CLIPS_S / 2.0
-    cuts = []
+    # 6) cut each segment (with optional silence padding), grouping the
+    #    entries per source so each video is demuxed once
+    by_src = {}
     for idx, e in enumerate(entries):
-        fld = e["folder"]
-        base = fld[:-6] if fld.endswith("_files") else fld
-        orig = os.path.join(fld, f"{base}.mp4")
+        orig = videos[e["folder"]]
+        if orig is None:
+            continue
         src = keyed_map.get(orig, orig)  # fallback to original if keying failed
 
         st, en = e["start"], e["end"]
         # pad half-silence before/after each cut
         cs = max(0.0, st - half_sil)
         ce = en + half_sil
+        by_src.setdefault(src, []).append((idx, cs, ce))
+
+    # sources are independent ffmpeg runs (copy codec → I/O bound), so overlap them
+    clip_for = {}
+    workers = max(1, min(len(by_src), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = [
+            ex.submit(cut_source, src, jobs, tmp, n)
+            for n, (src, jobs) in enumerate(by_src.items())
+        ]
+        for fut in futures:
+            clip_for.update(fut.result())
 
-        out_clip = os.path.join(tmp, f"{idx:03d}.mp4")
-        print(f"[{idx}] Cutting {cs:.3f}s → {ce:.3f}s from {os.path.basename(src)}")
-        cut_segment(src, cs, ce, out_clip)
-        cuts.append(out_clip)
+    # keep the original entry order for the concat list
+    cuts = [clip_for[idx] for idx in sorted(clip_for)]
 
     if not cuts:
         shutil.rmtree(tmp)
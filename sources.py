@@ -0,0 +1,24 @@
+# sources.py
+# Map findref entries to the source videos the slicers cut from.
+
+import os
+import sys
+
+def resolve_videos(entries):
+    """
+    Map each entry folder to its source video (<folder minus _files>.mp4),
+    or None if it is missing. Each folder is resolved and stat'ed once.
+    """
+    resolved = {}
+    for e in entries:
+        fld = e["folder"]
+        if fld in resolved:
+            continue
+        name = fld[:-6] if fld.endswith("_files") else fld
+        path = os.path.join(fld, f"{name}.mp4")
+        if os.path.isfile(path):
+            resolved[fld] = path
+        else:
+            print(f"⚠ Video missing: {path}, skipping", file=sys.stderr)
+            resolved[fld] = None
+    return resolved
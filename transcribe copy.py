@@ -3,35 +3,27 @@
 
 import argparse
 import os
-import json
-import whisperx
-from tqdm import tqdm
-from config_transcribe import device, model_size, compute_type, language
+import sys
+from config_transcribe import device, language
+import jsonio
+from _model import get_model, get_align_model
 
 def transcribe(video_path, sentence_level=False, word_level=False):
-    print(f"[INFO] Loading model '{model_size}' on {device} with {compute_type} precision...")
-    model = whisperx.load_model(model_size, device=device, compute_type=compute_type)
+    import whisperx  # deferred so --help and argument errors return instantly
+
+    model = get_model()
 
     audio = whisperx.load_audio(video_path)
     print(f"[INFO] Running transcription{' (lang='+language+')' if language else ''}...")
     result = model.transcribe(audio, language=language)
 
-    # load alignment model
-    # load alignment model
-    print("[INFO] Loading alignment model...")
-    align_model, metadata = whisperx.load_align_model(
-        language_code=language or result["language"],
-        device=device
-    )
-
-
-    # align each segment with a progress bar
+    # align all segments in one batched call (word-level only)
     word_segments = []
     if word_level:
-        print("[INFO] Aligning segments for word-level timestamps:")
-        for segment in tqdm(result["segments"], desc="Aligning", unit="segment"):
-            out = whisperx.align([segment], align_model, metadata, audio, device=device)
-            word_segments.extend(out["word_segments"])
+        align_model, metadata = get_align_model(language or result["language"])
+        print(f"[INFO] Aligning {len(result['segments'])} segments for word-level timestamps...")
+        aligned = whisperx.align(result["segments"], align_model, metadata, audio, device=device)
+        word_segments = aligned["word_segments"]
 
     # prepare output folder
     video_name = os.path.splitext(os.path.basename(video_path))[0]
@@ -41,15 +33,13 @@ def transcribe(video_path, sentence_level=False, word_level=False):
     # word-level JSON
     if word_level:
         word_path = os.path.join(output_folder, f"{video_name}_word.json")
-        with open(word_path, "w", encoding="utf-8") as wf:
-            json.dump(word_segments, wf, indent=2, ensure_ascii=False)
+        jsonio.dump(word_segments, word_path)
         print(f"[✔] Word-level transcription → {word_path}")
 
     # sentence-level JSON
     if sentence_level:
         sentence_path = os.path.join(output_folder, f"{video_name}_sentence.json")
-        with open(sentence_path, "w", encoding="utf-8") as sf:
-            json.dump(result["segments"], sf, indent=2, ensure_ascii=False)
+        jsonio.dump(result["segments"], sentence_path)
         print(f"[✔] Sentence-level transcription → {sentence_path}")
 
 
@@ -57,13 +47,29 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Transcribe with WhisperX (sentence/word-level) using config_transcribe.py"
     )
-    parser.add_argument("video_path", help="Path to video/audio file")
+    parser.add_argument("video_path", nargs="?", help="Path to video/audio file")
     parser.add_argument("-s", "--sentence", action="store_true", help="Enable sentence-level transcription")
     parser.add_argument("-w", "--word", action="store_true", help="Enable word-level transcription")
+    parser.add_argument("--server", action="store_true",
+                        help="Keep the models loaded and transcribe one path per line read from stdin")
     args = parser.parse_args()
 
     if not (args.sentence or args.word):
         print("⚠ Please specify at least one of -s (sentence) or -w (word).")
         exit(1)
+    if not (args.server or args.video_path):
+        print("⚠ Please give a video_path (or use --server).")
+        exit(1)
 
-    transcribe(args.video_path, sentence_level=args.sentence, word_level=args.word)
+    if args.server:
+        print("[INFO] Server mode: reading video paths from stdin...")
+        for line in sys.stdin:
+            path = line.strip()
+            if not path:
+                continue
+            try:
+                transcribe(path, sentence_level=args.sentence, word_level=args.word)
+            except Exception as e:
+                print(f"⚠ Failed on {path}: {e}", file=sys.stderr)
+    else:
+        transcribe(args.video_path, sentence_level=args.sentence, word_level=args.word)
@@ -1,63 +1,342 @@
 # transcribe.py
 
 import argparse
+import gc
+import hashlib
+import multiprocessing as mp
 import os
-import json
-import whisperx
-from tqdm import tqdm
-from config_transcribe import device, model_size, compute_type, language, alignment_model
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+# torch/torchaudio/whisperx are imported where they are used, so --help and
+# argument errors don't pay their multi-second import
+from config_transcribe import device, model_size, language, alignment_model, batch_size, beam_size, num_workers
+import jsonio
+from _model import get_model, get_align_model, resolve_compute_type
 
-def transcribe(video_path, sentence_level=False, word_level=False):
-    print(f"[INFO] Loading model '{model_size}' on {device} with {compute_type} precision...")
-    model = whisperx.load_model(model_size, device=device, compute_type=compute_type)
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
 
-    audio = whisperx.load_audio(video_path)
+def load_audio(path):
+    """
+    Decode `path` to float32 mono @ SAMPLE_RATE in-process with torchaudio
+    (resampling on `device`), falling back to WhisperX's ffmpeg pipe for
+    containers torchaudio can't read (or when torchaudio / its decoding
+    backend isn't installed).
+    WhisperX's VAD and feature extraction need a CPU numpy array, so the
+    result is returned on the CPU.
+    """
+    import whisperx
+    from whisperx.audio import SAMPLE_RATE
+
+    try:
+        import torchaudio
+        wav, sr = torchaudio.load(path)
+    except (ImportError, RuntimeError, OSError):
+        return whisperx.load_audio(path)
+    wav = wav.mean(0).to(device)
+    if sr != SAMPLE_RATE:
+        wav = torchaudio.functional.resample(wav, sr, SAMPLE_RATE)
+    return wav.cpu().numpy()
+
+def release_memory():
+    """
+    Return memory held by models that were just dropped (incl. cached VRAM).
+    """
+    import torch
+
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+# segments aligned per whisperx.align call when streaming word-level output
+ALIGN_CHUNK = 32
+# chunks aligned concurrently, so one chunk's host-side work overlaps the next's forward pass
+ALIGN_WORKERS = 2
+# audio context kept around each chunk's segments when trimming the buffer
+ALIGN_PAD_S = 1.0
+
+def align_words(segments, align_model, metadata, audio):
+    """
+    Yield word segments, aligning ALIGN_CHUNK segments at a time so memory
+    stays bounded however long the transcript is. Each chunk is aligned
+    against only its own slice of the audio (plus ALIGN_PAD_S of context),
+    with timestamps shifted into the slice and back.
+    Progress advances once per chunk and redraws at most once a second.
+    """
+    import whisperx
+    from tqdm import tqdm
+    from whisperx.audio import SAMPLE_RATE
+
+    def align_chunk(chunk):
+        offset = max(0.0, min(seg["start"] for seg in chunk) - ALIGN_PAD_S)
+        end = max(seg["end"] for seg in chunk) + ALIGN_PAD_S
+        clip = audio[int(offset * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        shifted = [{**seg, "start": seg["start"] - offset, "end": seg["end"] - offset}
+                   for seg in chunk]
+        out = whisperx.align(shifted, align_model, metadata, clip,
+                             device=device, return_char_alignments=False)
+        words = out["word_segments"]
+        for w in words:
+            # unalignable words (e.g. digits) come back without timestamps
+            if "start" in w:
+                w["start"] = round(w["start"] + offset, 3)
+            if "end" in w:
+                w["end"] = round(w["end"] + offset, 3)
+        return words
+
+    with ThreadPoolExecutor(max_workers=ALIGN_WORKERS) as ex, \
+         tqdm(total=len(segments), desc="Aligning", unit="segment",
+              mininterval=1.0, smoothing=0.05) as bar:
+        pending = deque()
+
+        def finish():
+            n, fut = pending.popleft()
+            words = fut.result()
+            bar.update(n)
+            return words
+
+        for i in range(0, len(segments), ALIGN_CHUNK):
+            chunk = segments[i:i + ALIGN_CHUNK]
+            pending.append((len(chunk), ex.submit(align_chunk, chunk)))
+            if len(pending) >= ALIGN_WORKERS:
+                yield from finish()
+        while pending:
+            yield from finish()
+
+def transcription_key(path):
+    """
+    Cache key for a transcription: hash of the file contents plus the
+    settings that change the result (blake3 when installed, else blake2b).
+    """
+    h = blake3() if blake3 is not None else hashlib.blake2b(digest_size=20)
+    h.update(f"{model_size}|{resolve_compute_type()}|{language}|{beam_size}|".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def save_sentences(segments, path, pretty=False):
+    jsonio.dump(segments, path, pretty=pretty)
+    print(f"[✔] Sentence-level transcription → {path}")
+
+def output_paths(video_path):
+    """
+    (output folder, video name, transcription cache file) for video_path;
+    creates the folders.
+    """
+    video_name = Path(video_path).stem
+    output_folder = Path(f"{video_name}_files") / "transcribed"
+    cache_dir = output_folder / ".cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return output_folder, video_name, cache_dir / f"{transcription_key(video_path)}.segments.json"
+
+def run_asr(audio, cache_path):
+    """
+    Transcribe decoded audio with the cached ASR model and store the result
+    under cache_path.
+    """
+    model = get_model()
     print(f"[INFO] Running transcription{' (lang='+language+')' if language else ''}...")
-    result = model.transcribe(audio, language=language)
+    result = model.transcribe(audio, batch_size=batch_size, language=language,
+                              num_workers=num_workers)
+    jsonio.dump(result, cache_path, pretty=False)
+    return result
 
-    print("[INFO] Loading alignment model...")
-    align_model, metadata = whisperx.load_align_model(
-        language_code=language or result["language"],
-        device=device,
-        model_name=alignment_model
-    )
+def write_words(result, audio, output_folder, video_name, pretty=False):
+    """
+    Align result's segments with the cached alignment model, streaming the
+    word-level JSON to disk as each chunk is aligned.
+    """
+    align_model, metadata = get_align_model(language or result["language"], alignment_model)
+    print(f"[INFO] Aligning {len(result['segments'])} segments for word-level timestamps...")
+    word_path = output_folder / f"{video_name}_word.json"
+    jsonio.dump_iter(align_words(result["segments"], align_model, metadata, audio), word_path,
+                     pretty=pretty)
+    print(f"[✔] Word-level transcription → {word_path}")
 
-    word_segments = []
-    if word_level:
-        print("[INFO] Aligning segments for word-level timestamps:")
-        for segment in tqdm(result["segments"], desc="Aligning", unit="segment"):
-            out = whisperx.align([segment], align_model, metadata, audio, device=device)
-            word_segments.extend(out["word_segments"])
+def transcribe(video_path, sentence_level=False, word_level=False, keep_models=False,
+               pretty=False):
+    """
+    Transcribe one file. With keep_models the (cached) models stay loaded for
+    the next call; otherwise each is released as soon as it is done.
+    Transcripts are compact JSON unless `pretty` is set.
+    """
+    output_folder, video_name, cache_path = output_paths(video_path)
+    audio = None
 
-    video_name = os.path.splitext(os.path.basename(video_path))[0]
-    output_folder = os.path.join(f"{video_name}_files", "transcribed")
-    os.makedirs(output_folder, exist_ok=True)
+    # reuse an earlier transcription of the same content with the same settings
+    if cache_path.is_file():
+        print(f"[INFO] Reusing cached transcription {cache_path}")
+        result = jsonio.load(cache_path)
+    else:
+        audio = load_audio(video_path)
+        result = run_asr(audio, cache_path)
+        # free the ASR model before the alignment model is loaded (VRAM OOM on
+        # 8–16 GB GPUs). With keep_models (server mode) it stays cached, so
+        # both models are resident while aligning.
+        if not keep_models:
+            get_model.cache_clear()
+            release_memory()
+
+    if sentence_level:
+        save_sentences(result["segments"], output_folder / f"{video_name}_sentence.json", pretty)
 
     if word_level:
-        word_path = os.path.join(output_folder, f"{video_name}_word.json")
-        with open(word_path, "w", encoding="utf-8") as wf:
-            json.dump(word_segments, wf, indent=2, ensure_ascii=False)
-        print(f"[✔] Word-level transcription → {word_path}")
+        if audio is None:
+            audio = load_audio(video_path)
+        write_words(result, audio, output_folder, video_name, pretty)
+        if not keep_models:
+            get_align_model.cache_clear()
+            release_memory()
 
-    if sentence_level:
-        sentence_path = os.path.join(output_folder, f"{video_name}_sentence.json")
-        with open(sentence_path, "w", encoding="utf-8") as sf:
-            json.dump(result["segments"], sf, indent=2, ensure_ascii=False)
-        print(f"[✔] Sentence-level transcription → {sentence_path}")
+def serve(sentence_level=False, word_level=False, pretty=False):
+    """
+    Keep the models loaded and transcribe one path per line read from stdin,
+    so the multi-second model load is paid once for many videos. Jobs arrive
+    one at a time, so with -w both models stay resident (needs the VRAM for
+    both); batch the files on the command line to avoid that.
+    """
+    print("[INFO] Server mode: reading video paths from stdin...")
+    for line in sys.stdin:
+        path = line.strip()
+        if not path:
+            continue
+        try:
+            transcribe(path, sentence_level, word_level, keep_models=True, pretty=pretty)
+        except Exception as e:
+            print(f"⚠ Failed on {path}: {e}", file=sys.stderr)
+
+def prefetched_audio(loader, paths):
+    """
+    Yield each path's decoded audio in order, decoding the next one on
+    `loader` while the current one is in use.
+    """
+    next_audio = loader.submit(load_audio, paths[0]) if paths else None
+    for i in range(len(paths)):
+        audio = next_audio.result()
+        if i + 1 < len(paths):
+            next_audio = loader.submit(load_audio, paths[i + 1])
+        yield audio
+
+def transcribe_many(paths, sentence_level=False, word_level=False, pretty=False):
+    """
+    Transcribe several files batched by model type: ASR for every file, then
+    the ASR model is freed and every file is aligned, so the two models are
+    never resident at once. Audio is decoded one file ahead in a background
+    thread (only for files that need it) and sentence JSON is written in
+    another.
+    """
+    if len(paths) == 1:
+        transcribe(paths[0], sentence_level, word_level, pretty=pretty)
+        return
+
+    outs = [output_paths(path) for path in paths]
+    # only decode audio a file will actually use: a cached transcription
+    # needs none until it is aligned
+    cached = [cache_path.is_file() for _, _, cache_path in outs]
+    results = [None] * len(paths)
+
+    with ThreadPoolExecutor(max_workers=1) as loader, \
+         ThreadPoolExecutor(max_workers=1) as writer:
+        writes = []
+        audios = prefetched_audio(loader, [p for p, hit in zip(paths, cached) if not hit])
+        for i, (output_folder, video_name, cache_path) in enumerate(outs):
+            if cached[i]:
+                print(f"[INFO] Reusing cached transcription {cache_path}")
+                results[i] = jsonio.load(cache_path)
+            else:
+                results[i] = run_asr(next(audios), cache_path)
+            if sentence_level:
+                writes.append(writer.submit(save_sentences, results[i]["segments"],
+                                            output_folder / f"{video_name}_sentence.json", pretty))
+        if not all(cached):
+            get_model.cache_clear()
+            release_memory()
+
+        if word_level:
+            for (output_folder, video_name, _), result, audio in zip(
+                    outs, results, prefetched_audio(loader, paths)):
+                write_words(result, audio, output_folder, video_name, pretty)
+                del audio
+            get_align_model.cache_clear()
+            release_memory()
+
+        for w in writes:
+            w.result()  # surface write errors
+
+def _gpu_worker(gpu, paths, sentence_level, word_level, pretty):
+    # pin this worker to one GPU before CUDA is initialised in it
+    os.environ["CUDA_VISIBLE_DEVICES"] = gpu
+    transcribe_many(paths, sentence_level=sentence_level, word_level=word_level, pretty=pretty)
+
+def transcribe_multi_gpu(paths, gpus, sentence_level=False, word_level=False, pretty=False):
+    """
+    Data-parallel mode: the files are split across one worker process per
+    GPU, each running transcribe_many on its share with its own models.
+    Workers are plain (non-daemonic) processes, so WhisperX's DataLoader may
+    still start its own workers inside them.
+    """
+    ctx = mp.get_context("spawn")
+    workers = []
+    for i, gpu in enumerate(gpus):
+        share = paths[i::len(gpus)]
+        if not share:
+            continue
+        proc = ctx.Process(target=_gpu_worker,
+                           args=(gpu, share, sentence_level, word_level, pretty))
+        proc.start()
+        workers.append((gpu, share, proc))
+
+    failed = False
+    for gpu, share, proc in workers:
+        proc.join()
+        if proc.exitcode == 0:
+            print(f"[✔] GPU {gpu}: done with {len(share)} file(s)")
+        else:
+            print(f"⚠ GPU {gpu} worker failed (exit code {proc.exitcode})", file=sys.stderr)
+            failed = True
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Transcribe with WhisperX (sentence/word-level) using config_transcribe.py"
     )
-    parser.add_argument("video_path", help="Path to video/audio file")
+    parser.add_argument("video_paths", nargs="*", metavar="video_path",
+                        help="Path(s) to video/audio files; models are loaded once for all of them")
     parser.add_argument("-s", "--sentence", action="store_true",
                         help="Enable sentence-level transcription")
     parser.add_argument("-w", "--word", action="store_true",
                         help="Enable word-level transcription")
+    parser.add_argument("--server", action="store_true",
+                        help="Keep the models loaded and transcribe one path per line read from stdin")
+    parser.add_argument("--gpus",
+                        help="Comma-separated GPU ids (e.g. 0,1): spread the files over one worker per GPU")
+    parser.add_argument("--pretty", action="store_true",
+                        help="Indent the JSON output (default: compact)")
     args = parser.parse_args()
 
     if not (args.sentence or args.word):
         print("⚠ Please specify at least one of -s (sentence) or -w (word).")
         exit(1)
+    if not (args.server or args.video_paths):
+        print("⚠ Please give at least one video_path (or use --server).")
+        exit(1)
+
+    gpus = [g.strip() for g in args.gpus.split(",") if g.strip()] if args.gpus else []
+    if len(gpus) > 1 and not device.startswith("cuda"):
+        print(f"⚠ --gpus needs device = \"cuda\" in config_transcribe.py (got \"{device}\").")
+        exit(1)
 
-    transcribe(args.video_path, sentence_level=args.sentence, word_level=args.word)
+    if args.server:
+        serve(sentence_level=args.sentence, word_level=args.word, pretty=args.pretty)
+    elif len(gpus) > 1 and len(args.video_paths) > 1:
+        transcribe_multi_gpu(args.video_paths, gpus, sentence_level=args.sentence,
+                             word_level=args.word, pretty=args.pretty)
+    else:
+        transcribe_many(args.video_paths, sentence_level=args.sentence, word_level=args.word,
+                        pretty=args.pretty)